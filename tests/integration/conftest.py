@@ -3,16 +3,197 @@
 
 """Fixtures for maubot integration tests."""
 
+# Disabling it due any_charm source.
+# pylint: disable=line-too-long
+
+import asyncio
+import hashlib
 import json
+import logging
+import secrets
+import textwrap
 from pathlib import Path
-from typing import Any, AsyncGenerator, Callable, Coroutine
+from typing import Any, AsyncGenerator, Callable, Coroutine, Generator
 
 import pytest
 import pytest_asyncio
+import requests
 from juju.application import Application
 from juju.model import Model
 from juju.unit import Unit
 from pytest_operator.plugin import OpsTest
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
+
+from tests.integration.helpers import MaubotClient, download_text
+
+logger = logging.getLogger(__name__)
+
+CHARM_LIBS_PATH = Path(__file__).parents[2] / "lib" / "charms"
+GRAFANA_LIB_URL = (
+    "https://github.com/canonical/grafana-k8s-operator/raw/refs/heads/main"
+    "/lib/charms/grafana_k8s/v0/grafana_dashboard.py"
+)
+GRAFANA_LIB_PATH = CHARM_LIBS_PATH / "grafana_k8s" / "v0" / "grafana_dashboard.py"
+LOKI_LIB_URL = (
+    "https://github.com/canonical/loki-k8s-operator/raw/refs/heads/main"
+    "/lib/charms/loki_k8s/v1/loki_push_api.py"
+)
+LOKI_LIB_PATH = CHARM_LIBS_PATH / "loki_k8s" / "v1" / "loki_push_api.py"
+
+ANY_GRAFANA_CHARM_PY = textwrap.dedent(
+    """\
+    from grafana_dashboard import GrafanaDashboardConsumer
+    from any_charm_base import AnyCharmBase
+    class AnyCharm(AnyCharmBase):
+        def __init__(self, *args, **kwargs):
+            super().__init__(*args, **kwargs)
+            self.grafana_dashboard_consumer = GrafanaDashboardConsumer(self, relation_name="require-grafana-dashboard")  # noqa: E501
+        def validate_dashboard(self):
+            relation = self.model.get_relation("require-grafana-dashboard")
+            dashboards = self.grafana_dashboard_consumer.get_dashboards_from_relation(relation.id)  # noqa: E501
+            if len(dashboards) == 0:
+                raise ValueError("dashboard not found")
+            other_app = relation.app
+            raw_data = relation.data[other_app].get("dashboards", "")
+            if not raw_data:
+                raise ValueError("dashboard has no raw data")
+        @property
+        def peers(self):
+            return self.model.get_relation("peer-any")
+    """
+)
+
+ANY_LOKI_CHARM_PY = textwrap.dedent(
+    """\
+    from loki_push_api import LokiPushApiProvider
+    from any_charm_base import AnyCharmBase
+    class AnyCharm(AnyCharmBase):
+        def __init__(self, *args, **kwargs):
+            super().__init__(*args, **kwargs)
+            self.loki_provider = LokiPushApiProvider(self, relation_name="provide-logging")
+        def get_relation_id(self):
+            relation = self.model.get_relation("provide-logging")
+            return relation.id
+    """
+)
+
+
+def _charm_source_digest() -> str:
+    """Hash the files that end up in the built charm.
+
+    Returns:
+        Hex digest identifying the current charm sources.
+    """
+    digest = hashlib.blake2b()
+    paths = sorted(
+        path
+        for directory in ("src", "lib")
+        for path in Path(directory).rglob("*")
+        if path.is_file() and "__pycache__" not in path.parts
+    )
+    for path in paths + [Path("charmcraft.yaml"), Path("requirements.txt")]:
+        digest.update(str(path).encode())
+        digest.update(path.read_bytes())
+    return digest.hexdigest()
+
+
+@pytest.fixture(scope="session", name="http")
+def http_fixture() -> Generator[requests.Session, None, None]:
+    """HTTP session shared by all tests so keep-alive connections are pooled."""
+    session = requests.Session()
+    retry = Retry(
+        total=5,
+        backoff_factor=0.5,
+        status_forcelist=[502, 503, 504],
+        allowed_methods=frozenset(["GET", "POST"]),
+    )
+    adapter = HTTPAdapter(pool_connections=4, pool_maxsize=10, max_retries=retry)
+    session.mount("http://", adapter)
+    session.mount("https://", adapter)
+    yield session
+    session.close()
+
+
+@pytest.fixture(scope="session", name="maubot_client")
+def maubot_client_fixture(http: requests.Session) -> MaubotClient:
+    """Client for the Maubot API exposed through the ingress."""
+    return MaubotClient(http)
+
+
+def _patch_grafana_lib(grafana_lib: str) -> str:
+    """Rename the Grafana dashboard library peer relation to the any-charm one.
+
+    Args:
+        grafana_lib: Grafana dashboard library source.
+
+    Returns:
+        The patched library source.
+    """
+    return grafana_lib.replace('DEFAULT_PEER_NAME = "grafana"', 'DEFAULT_PEER_NAME = "peer-any"')
+
+
+@pytest.fixture(scope="session", name="charm_lib_fetcher")
+def charm_lib_fetcher_fixture(
+    request: pytest.FixtureRequest, http: requests.Session
+) -> Callable[[str, Path], str]:
+    """Return a function to download charm libraries, cached across test runs."""
+    offline = request.config.getoption("--offline")
+
+    def charm_lib_fetcher(url: str, vendored_path: Path) -> str:
+        """Download a charm library, reusing the cached copy if available.
+
+        The vendored copy is used instead when running with --offline or when
+        the download fails.
+
+        Args:
+            url: URL of the charm library.
+            vendored_path: path of the same library vendored in this repository.
+
+        Returns:
+            The charm library source.
+        """
+        if offline:
+            return vendored_path.read_text(encoding="utf-8")
+        key = f"maubot/charm_libs/{hashlib.sha256(url.encode()).hexdigest()}"
+        cached = request.config.cache.get(key, None)
+        if cached:
+            return cached
+        try:
+            charm_lib = download_text(http, url)
+        except requests.RequestException:
+            logger.warning("failed to download %s, using the vendored library", url)
+            return vendored_path.read_text(encoding="utf-8")
+        request.config.cache.set(key, charm_lib)
+        return charm_lib
+
+    return charm_lib_fetcher
+
+
+@pytest.fixture(scope="session", name="grafana_dashboard_lib")
+def grafana_dashboard_lib_fixture(charm_lib_fetcher: Callable[[str, Path], str]) -> str:
+    """Grafana dashboard library patched for any-charm."""
+    return _patch_grafana_lib(charm_lib_fetcher(GRAFANA_LIB_URL, GRAFANA_LIB_PATH))
+
+
+@pytest.fixture(scope="session", name="loki_push_api_lib")
+def loki_push_api_lib_fixture(charm_lib_fetcher: Callable[[str, Path], str]) -> str:
+    """Loki push API library for any-charm."""
+    return charm_lib_fetcher(LOKI_LIB_URL, LOKI_LIB_PATH)
+
+
+@pytest.fixture(scope="session", name="any_grafana_src_overwrite")
+def any_grafana_src_overwrite_fixture(grafana_dashboard_lib: str) -> str:
+    """Serialized any-charm src-overwrite consuming Grafana dashboards."""
+    return json.dumps(
+        {"grafana_dashboard.py": grafana_dashboard_lib, "any_charm.py": ANY_GRAFANA_CHARM_PY}
+    )
+
+
+@pytest.fixture(scope="session", name="any_loki_src_overwrite")
+def any_loki_src_overwrite_fixture(loki_push_api_lib: str) -> str:
+    """Serialized any-charm src-overwrite providing the Loki push API."""
+    return json.dumps({"loki_push_api.py": loki_push_api_lib, "any_charm.py": ANY_LOKI_CHARM_PY})
 
 
 @pytest_asyncio.fixture(scope="function", name="get_unit_ips")
@@ -52,10 +233,15 @@ def model_fixture(ops_test: OpsTest) -> Model:
 async def charm_fixture(pytestconfig: pytest.Config, ops_test: OpsTest) -> str | Path:
     """The path to charm."""
     charm = pytestconfig.getoption("--charm-file")
-    if not charm:
-        charm = await ops_test.build_charm(".")
-        assert charm, "Charm not built"
+    if charm:
         return charm
+    key = f"maubot/charm/{_charm_source_digest()}"
+    cached = pytestconfig.cache.get(key, None)
+    if cached and Path(cached).exists():
+        return cached
+    charm = await ops_test.build_charm(".")
+    assert charm, "Charm not built"
+    pytestconfig.cache.set(key, str(charm))
     return charm
 
 
@@ -70,12 +256,86 @@ async def maubot_application_fixture(
     assert maubot_image
     maubot = await model.deploy(f"./{charm}", resources={"maubot-image": maubot_image})
 
-    await model.wait_for_idle(timeout=600, status="blocked")
-
     yield maubot
 
 
+@pytest_asyncio.fixture(scope="module", name="deployed_stack")
+async def deployed_stack_fixture(
+    model: Model,
+    application: Application,
+) -> tuple[Application, Application, Application]:
+    """Deploy PostgreSQL and NGINX ingress integrator and integrate them with Maubot."""
+    postgresql_k8s, nginx_ingress_integrator = await asyncio.gather(
+        model.deploy("postgresql-k8s", channel="14/stable", trust=True),
+        model.deploy(
+            "nginx-ingress-integrator",
+            channel="edge",
+            config={
+                "path-routes": "/",
+                "service-hostname": "maubot.local",
+                "service-namespace": model.name,
+                "service-name": "maubot",
+            },
+            trust=True,
+        ),
+    )
+    await model.add_relation(application.name, postgresql_k8s.name)
+    await model.add_relation(application.name, nginx_ingress_integrator.name)
+    await model.wait_for_idle(
+        apps=[application.name, postgresql_k8s.name, nginx_ingress_integrator.name],
+        status="active",
+        timeout=1500,
+    )
+
+    return application, postgresql_k8s, nginx_ingress_integrator
+
+
 @pytest.fixture(scope="module", name="unit")
-def unit_fixture(application: Application) -> Unit:
-    """The maubot charm application unit."""
-    return application.units[0]
+def unit_fixture(deployed_stack: tuple[Application, Application, Application]) -> Unit:
+    """The maubot charm application unit, once integrated and active."""
+    return deployed_stack[0].units[0]
+
+
+@pytest_asyncio.fixture(scope="module", name="synapse")
+async def synapse_fixture(
+    model: Model,
+    deployed_stack: tuple[Application, Application, Application],
+) -> Application:
+    """Deploy Synapse and integrate it with Maubot through matrix-auth."""
+    maubot = deployed_stack[0]
+    # setting public_baseurl to an URL that Maubot can access
+    # in production environment, this is the external URL accessed by clients
+    public_baseurl = f"http://synapse-0.synapse-endpoints.{model.name}.svc.cluster.local:8080/"
+    synapse = await model.deploy(
+        "synapse",
+        application_name="synapse",
+        channel="latest/edge",
+        config={
+            "server_name": "test1",
+            "public_baseurl": public_baseurl,
+        },
+    )
+    await model.add_relation(f"{synapse.name}:matrix-auth", f"{maubot.name}:matrix-auth")
+    await model.wait_for_idle(apps=[synapse.name, maubot.name], status="active")
+    return synapse
+
+
+@pytest_asyncio.fixture(scope="module", name="admin_credentials")
+async def admin_credentials_fixture(
+    deployed_stack: tuple[Application, Application, Application],
+    maubot_client: MaubotClient,
+) -> tuple[str, str, str]:
+    """Create a Maubot admin and login with it, returning name, password and token."""
+    unit = deployed_stack[0].units[0]
+    name = secrets.token_urlsafe(5)
+    action = await unit.run_action("create-admin", name=name)
+    await action.wait()
+    assert "password" in action.results
+    password = action.results["password"]
+    response = await maubot_client.apost(
+        "/_matrix/maubot/v1/auth/login", json={"username": name, "password": password}
+    )
+    assert response.status_code == 200
+    token = response.json().get("token")
+    assert token
+    return name, password, token
@@ -0,0 +1,166 @@
+# Copyright 2025 Canonical Ltd.
+# See LICENSE file for licensing details.
+
+"""Helpers for maubot integration tests."""
+
+import asyncio
+import time
+from typing import Any, Awaitable, Callable
+
+import requests
+
+
+async def wait_for(
+    func: Callable[[], Awaitable[bool]], timeout: float = 300, check_interval: float = 10
+) -> None:
+    """Wait for a condition to become true, checking it periodically.
+
+    Args:
+        func: async function returning whether the condition is met.
+        timeout: maximum time to wait in seconds.
+        check_interval: time between checks in seconds.
+
+    Raises:
+        TimeoutError: if the condition is not met before the timeout.
+    """
+    deadline = time.monotonic() + timeout
+    while not await func():
+        if time.monotonic() >= deadline:
+            raise TimeoutError(f"condition not met after {timeout} seconds")
+        await asyncio.sleep(check_interval)
+
+
+def download_text(session: requests.Session, url: str) -> str:
+    """Download a text file, streaming the body in chunks.
+
+    Args:
+        session: HTTP session used to send the request.
+        url: URL of the file.
+
+    Returns:
+        The file content.
+    """
+    response = session.get(url, timeout=(3.05, 30), stream=True)
+    response.raise_for_status()
+    if response.encoding is None:
+        response.encoding = "utf-8"
+    return "".join(response.iter_content(chunk_size=65536, decode_unicode=True))
+
+
+class MaubotClient:
+    """HTTP client for Maubot reached through the NGINX ingress.
+
+    Attrs:
+        base_url: URL of the ingress.
+        host: Host header routing the requests to Maubot.
+    """
+
+    def __init__(
+        self,
+        session: requests.Session,
+        base_url: str = "http://127.0.0.1",
+        host: str = "maubot.local",
+    ):
+        """Initialize the client.
+
+        Args:
+            session: HTTP session used to send the requests.
+            base_url: URL of the ingress.
+            host: Host header routing the requests to Maubot.
+        """
+        self._session = session
+        self.base_url = base_url
+        self.host = host
+
+    def get(self, path: str, **kwargs: Any) -> requests.Response:
+        """Send a GET request to Maubot.
+
+        Args:
+            path: path of the endpoint, starting with a slash.
+            kwargs: extra arguments passed to requests.
+
+        Returns:
+            The response.
+        """
+        return self._request("GET", path, **kwargs)
+
+    def post(self, path: str, **kwargs: Any) -> requests.Response:
+        """Send a POST request to Maubot.
+
+        Args:
+            path: path of the endpoint, starting with a slash.
+            kwargs: extra arguments passed to requests.
+
+        Returns:
+            The response.
+        """
+        return self._request("POST", path, **kwargs)
+
+    async def aget(self, path: str, **kwargs: Any) -> requests.Response:
+        """Send a GET request to Maubot without blocking the event loop.
+
+        Args:
+            path: path of the endpoint, starting with a slash.
+            kwargs: extra arguments passed to requests.
+
+        Returns:
+            The response.
+        """
+        return await asyncio.to_thread(self.get, path, **kwargs)
+
+    async def apost(self, path: str, **kwargs: Any) -> requests.Response:
+        """Send a POST request to Maubot without blocking the event loop.
+
+        Args:
+            path: path of the endpoint, starting with a slash.
+            kwargs: extra arguments passed to requests.
+
+        Returns:
+            The response.
+        """
+        return await asyncio.to_thread(self.post, path, **kwargs)
+
+    def _request(self, method: str, path: str, **kwargs: Any) -> requests.Response:
+        """Send a request to Maubot with the default Host header and timeout.
+
+        Args:
+            method: HTTP method.
+            path: path of the endpoint, starting with a slash.
+            kwargs: extra arguments passed to requests.
+
+        Returns:
+            The response.
+        """
+        kwargs.setdefault("timeout", 5)
+        kwargs["headers"] = {"Host": self.host, **kwargs.get("headers", {})}
+        return self._session.request(method, f"{self.base_url}{path}", **kwargs)
+
+
+async def wait_for_endpoint(
+    client: MaubotClient, path: str, expected: dict[str, Any], timeout: float = 30
+) -> None:
+    """Wait for a Maubot JSON endpoint to answer with the expected values.
+
+    Args:
+        client: Maubot client.
+        path: path of the endpoint, starting with a slash.
+        expected: keys and values the JSON response must contain.
+        timeout: maximum time to wait in seconds.
+    """
+
+    async def _endpoint_ready() -> bool:
+        """Check whether the endpoint answers with the expected values.
+
+        Returns:
+            True if the response is successful and contains the expected values.
+        """
+        try:
+            response = await client.aget(path)
+            if response.status_code != 200:
+                return False
+            data = response.json()
+        except requests.RequestException:
+            return False
+        return all(data.get(key) == value for key, value in expected.items())
+
+    await wait_for(_endpoint_ready, timeout=timeout, check_interval=1)
@@ -5,27 +5,12 @@
 
 
 import pytest
+from charms.synapse.v0.matrix_auth import MatrixAuthProviderData
 from ops.testing import Harness
 
 from charm import MaubotCharm
 
-
-@pytest.fixture(scope="function", name="harness")
-def harness_fixture():
-    """Enable ops test framework harness."""
-    harness = Harness(MaubotCharm)
-    harness.set_model_name("test")
-    harness.handle_exec(
-        "maubot",
-        ["cp", "--update=none", "/example-config.yaml", "/data/config.yaml"],
-        result=0,
-    )
-    harness.handle_exec(
-        "maubot", ["mkdir", "-p", "/data/plugins", "/data/trash", "/data/dbs"], result=0
-    )
-    root = harness.get_filesystem_root("maubot")
-    (root / "data").mkdir()
-    yaml_content = """\
+CONFIG_YAML = """\
 database: sqlite:maubot.db
 server:
     hostname: 0.0.0.0
@@ -35,6 +20,27 @@ admins:
     root: ''
     admin1: $2b$12$Rr4ZZctE6WATvCl/X7cmRuTJM3pS5hemqhkZWnl25bg1kQtqoQsVW
 """
-    (root / "data" / "config.yaml").write_text(yaml_content)
+
+
+@pytest.fixture(scope="session", autouse=True, name="matrix_shared_secret")
+def matrix_shared_secret_fixture():
+    """Patch the matrix-auth shared secret lookup once for the whole session."""
+    with pytest.MonkeyPatch.context() as monkeypatch:
+        monkeypatch.setattr(
+            MatrixAuthProviderData, "get_shared_secret", lambda *args: "test-shared-secret"
+        )
+        yield
+
+
+@pytest.fixture(scope="function", name="harness")
+def harness_fixture():
+    """Enable ops test framework harness."""
+    harness = Harness(MaubotCharm)
+    harness.set_model_name("test")
+    harness.handle_exec("maubot", ["cp"], result=0)
+    harness.handle_exec("maubot", ["mkdir"], result=0)
+    root = harness.get_filesystem_root("maubot")
+    (root / "data").mkdir()
+    (root / "data" / "config.yaml").write_text(CONFIG_YAML)
     yield harness
     harness.cleanup()
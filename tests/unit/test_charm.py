@@ -1,83 +1,74 @@
 # Copyright 2025 Canonical Ltd.
 # See LICENSE file for licensing details.
 
-# unnecessary-pass: disabled because of raise_for_status
-#   in test_register_client_account_action_success
 # unused-argument: disabled because of side_effect
 #   in test_register_client_account_action_success
-# pylint: disable=protected-access, duplicate-code, line-too-long, unnecessary-pass, unused-argument  # noqa:E501,W505
+# pylint: disable=protected-access, duplicate-code, line-too-long, unused-argument  # noqa:E501,W505
 
 """Unit tests."""
 
+from types import MappingProxyType, SimpleNamespace
 from unittest.mock import Mock
 
 import ops
 import ops.testing
 import pytest
 import requests
-from charms.synapse.v0.matrix_auth import MatrixAuthProviderData
-
-from charm import MissingRelationDataError
-
-
-def test_maubot_pebble_ready_postgresql_required(harness):
-    """
-    arrange: initialize the testing harness with handle_exec and
-        config.yaml file.
-    act: emit container pebble ready event.
-    assert: Charm is blocked due to the missing PostgreSQL integration.
-    """
-    harness.begin_with_initial_hooks()
 
-    harness.container_pebble_ready("maubot")
+from charm import MATRIX_AUTH_HOMESERVER, MissingRelationDataError
+from maubot import MAUBOT_ROOT_URL
 
-    assert harness.model.unit.status == ops.BlockedStatus("postgresql integration is required")
+MATRIX_AUTH_RELATION_DATA = MappingProxyType(
+    {"homeserver": "https://example.com", "shared_secret_id": "test-secret-id"}
+)
+POSTGRESQL_RELATION_DATA = MappingProxyType(
+    {
+        "database": "maubot",
+        "endpoints": "dbhost:5432",
+        "password": "somepasswd",  # nosec
+        "username": "someuser",
+    }
+)
+LOGIN_RESPONSE = SimpleNamespace(
+    raise_for_status=lambda: None,
+    json=lambda: {
+        # ignoring E501 because this is a real return value
+        "token": "c3SMnLi_XwIJr58xqQgBHQGHAVmF-p0iIK76nsrwVaA:eyJ1c2VyX2lkIjogImFtYW5kYSIsICJjcmVhdGVkX2F0IjogMTcyODQwODIwMX0"  # noqa: E501
+    },
+)
+REGISTER_RESPONSE = SimpleNamespace(
+    raise_for_status=lambda: None,
+    json=lambda: {
+        "user_id": "@bot1:banana.com",
+        "device_id": "GYPCJQXJDJ",
+        "access_token": "syt_YW1hbmRhYm90_yPAPaSqGISEDKZsbBETi_2XI5KE",
+        "well_known": {
+            "m.homeserver": {},
+            "m.identity_server": {},
+            "m.integrations": {"managers": []},
+        },
+        "home_server": "banana.com",
+    },
+)
+API_RESPONSES = MappingProxyType(
+    {
+        f"{MAUBOT_ROOT_URL}/v1/auth/login": LOGIN_RESPONSE,
+        f"{MAUBOT_ROOT_URL}/v1/client/auth/{MATRIX_AUTH_HOMESERVER}/register": REGISTER_RESPONSE,
+    }
+)
+HTTP_ERROR_RESPONSE = Mock(
+    raise_for_status=Mock(side_effect=requests.HTTPError("500 Server Error"))
+)
 
 
-def test_maubot_pebble_ready(harness):
-    """
-    arrange: initialize the testing harness with handle_exec and
-        config.yaml file.
-    act: retrieve the pebble plan for maubot.
-    assert: ensure the maubot pebble plan matches the expectations,
-        the service is running and the charm is active.
-    """
+@pytest.fixture(name="postgresql_harness")
+def postgresql_harness_fixture(harness):
+    """Started leader harness with a connectable container and postgresql integration."""
+    harness.set_leader()
     harness.begin()
     harness.set_can_connect("maubot", True)
     set_postgresql_integration(harness)
-
-    expected_plan = {
-        "services": {
-            "maubot": {
-                "override": "replace",
-                "summary": "maubot",
-                "command": "python3 -m maubot -c /data/config.yaml",
-                "startup": "enabled",
-                "working-dir": "/data",
-            },
-            "nginx": {
-                "override": "replace",
-                "summary": "nginx",
-                "command": "/usr/sbin/nginx",
-                "startup": "enabled",
-                "after": ["maubot"],
-            },
-            "blackbox": {
-                "command": "/usr/bin/blackbox_exporter --config.file=/etc/blackbox.yaml",
-                "override": "replace",
-                "startup": "enabled",
-                "summary": "blackbox-exporter",
-            },
-        },
-    }
-
-    harness.container_pebble_ready("maubot")
-
-    updated_plan = harness.get_container_pebble_plan("maubot").to_dict()
-    assert expected_plan == updated_plan
-    service = harness.model.unit.get_container("maubot").get_service("maubot")
-    assert service.is_running()
-    assert harness.model.unit.status == ops.ActiveStatus()
+    return harness
 
 
 def test_database_created(harness):
@@ -86,7 +77,7 @@ def test_database_created(harness):
     act: set postgresql integration.
     assert: postgresql credentials are set as expected.
     """
-    harness.begin_with_initial_hooks()
+    harness.begin()
     with pytest.raises(MissingRelationDataError, match="No postgresql relation data"):
         harness.charm._get_postgresql_credentials()
 
@@ -98,92 +89,59 @@ def test_database_created(harness):
     )
 
 
-def test_create_admin_action_success(harness):
+def test_create_admin_action_success(postgresql_harness):
     """
     arrange: initialize the testing harness and set up all required integration.
     act: run create-admin charm action.
     assert: ensure password is in the results.
     """
-    harness.set_leader()
-    harness.begin_with_initial_hooks()
-    set_postgresql_integration(harness)
-
-    action = harness.run_action("create-admin", {"name": "test"})
+    action = postgresql_harness.run_action("create-admin", {"name": "test"})
 
     assert "password" in action.results
     assert "error" not in action.results
 
 
-def test_create_admin_action_failed(harness):
+def test_create_admin_action_failed(postgresql_harness):
     """
     arrange: initialize the testing harness and set up all required integration.
     act: run create-admin charm action with reserved name root.
     assert: ensure action fails.
     """
-    harness.set_leader()
-    harness.begin_with_initial_hooks()
-    set_postgresql_integration(harness)
-
     try:
-        harness.run_action("create-admin", {"name": "root"})
+        postgresql_harness.run_action("create-admin", {"name": "root"})
     except ops.testing.ActionFailed as e:
         message = "root is reserved, please choose a different name"
         assert e.output.results["error"] == message
         assert e.message == message
 
 
-def test_public_url_config_changed(harness, monkeypatch):
+def test_public_url_config_changed(postgresql_harness):
     """
     arrange: initialize harness and set postgresql integration.
     act: change public-url config.
-    assert: charm is active.
+    assert: charm is active and the new public URL is in the maubot configuration.
     """
-    harness.begin_with_initial_hooks()
-    set_postgresql_integration(harness)
-    set_matrix_auth_integration(harness, monkeypatch)
+    set_matrix_auth_integration(postgresql_harness)
 
-    harness.update_config({"public-url": "https://example1.com"})
+    postgresql_harness.update_config({"public-url": "https://example1.com"})
 
-    service = harness.model.unit.get_container("maubot").get_service("maubot")
+    container = postgresql_harness.model.unit.get_container("maubot")
+    service = container.get_service("maubot")
     assert service.is_running()
-    assert harness.model.unit.status == ops.ActiveStatus()
+    config = container.pull("/data/config.yaml").read()
+    assert "public_url: https://example1.com" in config
+    assert postgresql_harness.model.unit.status == ops.ActiveStatus()
 
 
-def test_register_client_account_action_success(harness, monkeypatch):
+def test_register_client_account_action_success(postgresql_harness, monkeypatch):
     """
     arrange: initialize the testing harness and set up all required integration.
     act: mock API call to succeed and run register-client-account charm action.
     assert: ensure expected data is in the results.
     """
-    harness.set_leader()
-    harness.begin_with_initial_hooks()
-    set_postgresql_integration(harness)
-    set_matrix_auth_integration(harness, monkeypatch)
-
-    class MockResponse:
-        """Mock response"""
-
-        def __init__(self, json_data):
-            """Init mock.
-
-            Args:
-                json_data: data that will be returned to the request call.
-            """
-            self.json_data = json_data
-
-        def raise_for_status(self):
-            """Raise status."""
-            pass
+    set_matrix_auth_integration(postgresql_harness)
 
-        def json(self):
-            """Return json data.
-
-            Returns:
-                json data.
-            """
-            return self.json_data
-
-    def side_effect(url, **kwargs) -> MockResponse:
+    def side_effect(url, **kwargs) -> SimpleNamespace:
         """Create side effect for mock
 
         Args:
@@ -193,30 +151,11 @@ def test_register_client_account_action_success(harness, monkeypatch):
         Returns:
             Mock response.
         """
-        if "login" in url:
-            return MockResponse(
-                {
-                    # ignoring E501 because this is a real return value
-                    "token": "c3SMnLi_XwIJr58xqQgBHQGHAVmF-p0iIK76nsrwVaA:eyJ1c2VyX2lkIjogImFtYW5kYSIsICJjcmVhdGVkX2F0IjogMTcyODQwODIwMX0"  # noqa: E501
-                }
-            )
-        return MockResponse(
-            {
-                "user_id": "@bot1:banana.com",
-                "device_id": "GYPCJQXJDJ",
-                "access_token": "syt_YW1hbmRhYm90_yPAPaSqGISEDKZsbBETi_2XI5KE",
-                "well_known": {
-                    "m.homeserver": {},
-                    "m.identity_server": {},
-                    "m.integrations": {"managers": []},
-                },
-                "home_server": "banana.com",
-            }
-        )
+        return API_RESPONSES[url]
 
     monkeypatch.setattr(requests, "post", Mock(side_effect=side_effect))
 
-    action = harness.run_action(
+    action = postgresql_harness.run_action(
         "register-client-account",
         {"admin-name": "admin1", "admin-password": "password", "account-name": "bot1"},
     )
@@ -228,115 +167,91 @@ def test_register_client_account_action_success(harness, monkeypatch):
     assert "error" not in action.results
 
 
-def test_register_client_account_action_api_failed(harness, monkeypatch):
-    """
-    arrange: initialize the testing harness and set up all required integration.
-    act: mock API call to fail and run register-client-account charm action.
-    assert: event fails.
-    """
-    harness.set_leader()
-    harness.begin_with_initial_hooks()
-    set_postgresql_integration(harness)
-    set_matrix_auth_integration(harness, monkeypatch)
-    monkeypatch.setattr(
-        requests,
-        "post",
-        Mock(
-            side_effect=lambda *args, **kwargs: Mock(
-                raise_for_status=lambda: (_ for _ in ()).throw(
-                    requests.HTTPError("500 Server Error")
-                )
-            )
+@pytest.mark.parametrize(
+    "case",
+    [
+        pytest.param(
+            SimpleNamespace(
+                admin_name="admin1",
+                with_matrix_auth=True,
+                requests_post=Mock(return_value=HTTP_ERROR_RESPONSE),
+                message="error while interacting with Maubot API",
+            ),
+            id="api_failed",
         ),
-    )
-
-    try:
-        harness.run_action(
-            "register-client-account",
-            {"admin-name": "admin1", "admin-password": "password", "account-name": "bot1"},
-        )
-    except ops.testing.ActionFailed as e:
-        message = "error while interacting with Maubot API"
-        assert e.output.results["error"] == message
-        assert e.message == message
-
-
-def test_register_client_account_action_param_failed(harness, monkeypatch):
+        pytest.param(
+            SimpleNamespace(
+                admin_name="admin2",
+                with_matrix_auth=True,
+                requests_post=None,
+                message="admin2 not found in admin users",
+            ),
+            id="param_failed",
+        ),
+        pytest.param(
+            SimpleNamespace(
+                admin_name="admin",
+                with_matrix_auth=False,
+                requests_post=None,
+                message="matrix-auth integration is required",
+            ),
+            id="matrix_auth_failed",
+        ),
+    ],
+)
+def test_register_client_account_action_failed(postgresql_harness, monkeypatch, case):
     """
-    arrange: initialize the testing harness and set up all required integration.
-    act: run register-client-account charm action with non-existent user.
-    assert: event fails.
+    arrange: initialize the testing harness and set up the required integrations.
+    act: run register-client-account charm action with the given admin.
+    assert: event fails with the expected message.
     """
-    harness.set_leader()
-    harness.begin_with_initial_hooks()
-    set_postgresql_integration(harness)
-    set_matrix_auth_integration(harness, monkeypatch)
-    try:
-        harness.run_action(
-            "register-client-account",
-            {"admin-name": "admin2", "admin-password": "password", "account-name": "bot1"},
-        )
-    except ops.testing.ActionFailed as e:
-        message = "admin2 not found in admin users"
-        assert e.output.results["error"] == message
-        assert e.message == message
-
+    if case.with_matrix_auth:
+        set_matrix_auth_integration(postgresql_harness)
+    if case.requests_post is not None:
+        monkeypatch.setattr(requests, "post", case.requests_post)
 
-def test_register_client_account_action_matrix_auth_failed(harness):
-    """
-    arrange: initialize the testing harness and set up all required integration except matrix-auth.
-    act: run register-client-account charm action.
-    assert: event fails.
-    """
-    harness.set_leader()
-    harness.begin_with_initial_hooks()
-    set_postgresql_integration(harness)
-    try:
-        harness.run_action(
+    with pytest.raises(ops.testing.ActionFailed) as excinfo:
+        postgresql_harness.run_action(
             "register-client-account",
-            {"admin-name": "admin", "admin-password": "password", "account-name": "bot1"},
+            {"admin-name": case.admin_name, "admin-password": "password", "account-name": "bot1"},
         )
-    except ops.testing.ActionFailed as e:
-        message = "matrix-auth integration is required"
-        assert e.output.results["error"] == message
-        assert e.message == message
 
+    assert excinfo.value.output.results["error"] == case.message
+    assert excinfo.value.message == case.message
 
-def test_matrix_credentials_registered(harness, monkeypatch):
+
+def test_matrix_credentials_registered(harness):
     """
     arrange: initialize harness and verify that the credentials are set with default values.
     act: set matrix-auth integration.
     assert: matrix credentials are set as expected.
     """
-    harness.begin_with_initial_hooks()
+    harness.begin()
     assert harness.charm._get_matrix_credentials() == {
         "matrix": {"secret": "null", "url": "https://matrix-client.matrix.org"}
     }
 
-    set_matrix_auth_integration(harness, monkeypatch)
+    set_matrix_auth_integration(harness)
 
     assert harness.charm._get_matrix_credentials() == {
         "synapse": {"secret": "test-shared-secret", "url": "https://example.com"}
     }
 
 
-def set_matrix_auth_integration(harness, monkeypatch) -> None:
+def set_matrix_auth_integration(harness) -> None:
     """Set matrix-auth integration.
 
     Args:
         harness: harness instance.
-        monkeypatch: monkeypatch instance.
     """
-    monkeypatch.setattr(
-        MatrixAuthProviderData, "get_shared_secret", lambda *args: "test-shared-secret"
+    matrix_relation_id = harness.add_relation(
+        "matrix-auth", "synapse", app_data=dict(MATRIX_AUTH_RELATION_DATA)
     )
-    relation_data = {"homeserver": "https://example.com", "shared_secret_id": "test-secret-id"}
-    matrix_relation_id = harness.add_relation("matrix-auth", "synapse", app_data=relation_data)
     harness.add_relation_unit(matrix_relation_id, "synapse/0")
     harness.update_relation_data(
         matrix_relation_id,
         "synapse",
-        relation_data,
+        dict(MATRIX_AUTH_RELATION_DATA),
     )
 
 
@@ -346,12 +261,6 @@ def set_postgresql_integration(harness) -> None:
     Args:
         harness: harness instance.
     """
-    relation_data = {
-        "database": "maubot",
-        "endpoints": "dbhost:5432",
-        "password": "somepasswd",  # nosec
-        "username": "someuser",
-    }
     db_relation_id = harness.add_relation(  # pylint: disable=attribute-defined-outside-init
         "postgresql", "postgresql"
     )
@@ -359,5 +268,5 @@ def set_postgresql_integration(harness) -> None:
     harness.update_relation_data(
         db_relation_id,
         "postgresql",
-        relation_data,
+        dict(POSTGRESQL_RELATION_DATA),
     )
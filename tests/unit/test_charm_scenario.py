@@ -6,8 +6,8 @@
 
 """Unit tests for the Maubot module using Scenario."""
 
-import textwrap
 from pathlib import Path
+from types import MappingProxyType
 
 import ops
 import pytest
@@ -16,60 +16,126 @@ from scenario.context import _Event  # needed for custom events for now
 
 from charm import MaubotCharm
 
+CONFIG_YAML = """
+databases: null
+server:
+    public_url: maubot.local
+"""
+
+EXPECTED_PLAN = {
+    "services": {
+        "maubot": {
+            "override": "replace",
+            "summary": "maubot",
+            "command": "python3 -m maubot -c /data/config.yaml",
+            "startup": "enabled",
+            "working-dir": "/data",
+        },
+        "nginx": {
+            "override": "replace",
+            "summary": "nginx",
+            "command": "/usr/sbin/nginx",
+            "startup": "enabled",
+            "after": ["maubot"],
+        },
+        "blackbox": {
+            "command": "/usr/bin/blackbox_exporter --config.file=/etc/blackbox.yaml",
+            "override": "replace",
+            "startup": "enabled",
+            "summary": "blackbox-exporter",
+        },
+    },
+}
+
 
 @pytest.fixture(scope="function", name="base_state")
 def base_state_fixture(tmp_path: Path):
-    """State with container and config file set."""
+    """Read-only state with container and config file set."""
     config_file_path = tmp_path / "config.yaml"
-    config_file_path.write_text(
-        textwrap.dedent(
-            """
-        databases: null
-        server:
-            public_url: maubot.local
-        """
-        ),
-        encoding="utf-8",
+    config_file_path.write_text(CONFIG_YAML, encoding="utf-8")
+    yield MappingProxyType(
+        {
+            "leader": True,
+            "containers": {
+                scenario.Container(
+                    name="maubot",
+                    can_connect=True,
+                    execs={
+                        scenario.Exec(
+                            command_prefix=["cp"],
+                            return_code=0,
+                        ),
+                        scenario.Exec(
+                            command_prefix=["mkdir"],
+                            return_code=0,
+                        ),
+                    },
+                    mounts={
+                        "data": scenario.Mount(
+                            location="/data/config.yaml", source=config_file_path
+                        )
+                    },
+                )
+            },
+        }
     )
-    yield {
-        "leader": True,
-        "containers": {
-            scenario.Container(
-                name="maubot",
-                can_connect=True,
-                execs={
-                    scenario.Exec(
-                        command_prefix=["cp"],
-                        return_code=0,
-                    ),
-                    scenario.Exec(
-                        command_prefix=["mkdir"],
-                        return_code=0,
-                    ),
-                },
-                mounts={
-                    "data": scenario.Mount(location="/data/config.yaml", source=config_file_path)
-                },
-            )
-        },
-    }
 
 
-def test_config_changed_no_postgresql(base_state: dict):
+@pytest.mark.parametrize(
+    "event_factory",
+    [
+        pytest.param(lambda context, _: context.on.config_changed(), id="config_changed"),
+        pytest.param(
+            lambda context, container: context.on.pebble_ready(container), id="pebble_ready"
+        ),
+    ],
+)
+def test_postgresql_required(base_state: MappingProxyType, event_factory):
     """
     arrange: prepare maubot container.
-    act: run config_changed.
+    act: run config_changed or maubot_pebble_ready.
     assert: status is blocked because there is no postgresql integration.
     """
     state = ops.testing.State(**base_state)
     context = ops.testing.Context(
         charm_type=MaubotCharm,
     )
-    out = context.run(context.on.config_changed(), state)
+    container = next(iter(base_state["containers"]))
+    out = context.run(event_factory(context, container), state)
     assert out.unit_status == ops.testing.BlockedStatus("postgresql integration is required")
 
 
-def test_config_changed_with_postgresql(base_state: dict):
+def test_maubot_pebble_ready(base_state: MappingProxyType):
+    """
+    arrange: prepare maubot container and postgresql integration.
+    act: run maubot_pebble_ready.
+    assert: the maubot pebble plan matches the expectations, the maubot service is
+        running and the charm is active.
+    """
+    postgresql_relation = scenario.Relation(
+        endpoint="postgresql",
+        interface="postgresql_client",
+        remote_app_name="postgresql",
+        remote_app_data={
+            "endpoints": "dbhost:5432",
+            "username": "someuser",
+            "password": "somepasswd",  # nosec
+            "database": "maubot",
+        },
+    )
+    state = ops.testing.State(**base_state, relations=[postgresql_relation])
+    context = ops.testing.Context(
+        charm_type=MaubotCharm,
+    )
+    container = next(iter(base_state["containers"]))
+    out = context.run(context.on.pebble_ready(container), state)
+    assert out.unit_status == ops.testing.ActiveStatus()
+    out_container = out.get_container("maubot")
+    assert out_container.plan.to_dict() == EXPECTED_PLAN
+    assert out_container.service_statuses["maubot"] == ops.pebble.ServiceStatus.ACTIVE
+
+
+def test_config_changed_with_postgresql(base_state: MappingProxyType):
     """
     arrange: prepare maubot container.
     act: run config_changed.
@@ -90,19 +156,18 @@ def test_config_changed_with_postgresql(base_state: dict):
             "database": database,
         },
     )
-    base_state["relations"] = [postgresql_relation]
-    state = ops.testing.State(**base_state)
+    state = ops.testing.State(**base_state, relations=[postgresql_relation])
     context = ops.testing.Context(
         charm_type=MaubotCharm,
     )
     out = context.run(context.on.config_changed(), state)
     assert out.unit_status == ops.testing.ActiveStatus()
-    container_root_fs = list(base_state["containers"])[0].get_filesystem(context)
+    container_root_fs = next(iter(base_state["containers"])).get_filesystem(context)
     config_file = container_root_fs / "data" / "config.yaml"
     assert f"postgresql://{username}:{password}@{endpoints}/{database}" in config_file.read_text()
 
 
-def test_postgresql_relation_departed(base_state: dict):
+def test_postgresql_relation_departed(base_state: MappingProxyType):
     """
     arrange: prepare maubot container.
     act: run config_changed.
@@ -113,8 +178,7 @@ def test_postgresql_relation_departed(base_state: dict):
         interface="postgresql_client",
         remote_app_name="postgresql",
     )
-    base_state["relations"] = [postgresql_relation]
-    state = ops.testing.State(**base_state)
+    state = ops.testing.State(**base_state, relations=[postgresql_relation])
     context = ops.testing.Context(
         charm_type=MaubotCharm,
     )